@@ -57,7 +57,8 @@ def remove_successors(s_i):
 def implication(G: SGraph, i = 1):
     # If the reachable set is the whole set of nodes, return successful
     if len(G.reachable) == len(G.nodes):
-        debug(f"Implication Successful at level {i}")
+        if DEBUG:
+            debug(f"Implication Successful at level {i}")
         return True
     
     # Find all nodes with in_degree 0
@@ -71,7 +72,8 @@ def implication(G: SGraph, i = 1):
         G.sets.append(s_i)
         G.reachable = G.reachable.union(s_i)
 
-        debug(f"Implication: {G.sets[min(i-1, len(G.sets)-1)]} -> {s_i}")
+        if DEBUG:
+            debug(f"Implication: {G.sets[min(i-1, len(G.sets)-1)]} -> {s_i}")
         
         # Remove Edges
         successor_list = remove_successors(s_i)
@@ -91,14 +93,16 @@ def implication(G: SGraph, i = 1):
             (u, v) = G.restore_edge()
         return False
     else:
-        debug(f"No Further implications found at level {i}")
+        if DEBUG:
+            debug(f"No Further implications found at level {i}")
         return False
     
 def run_combination(G: SGraph, k: int):
     s_0 = G.sets[0]
     k0 = len(s_0)
     if k - k0 == 0:
-        debug(f"Testing Implication with S0: {s_0}")
+        if DEBUG:
+            debug(f"Testing Implication with S0: {s_0}")
         return implication(G, 1)
     s_0_prime = set(G.nodes).difference(s_0)
     for node in s_0_prime:
@@ -1,198 +1,941 @@
-import networkx as nx
-import heapq
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from typing import Set, List, Tuple, Dict
 import time
 
-class SGraph(nx.DiGraph):
-    """Enhanced directed graph for Kuo's algorithm with efficient backtracking."""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional: the kernels still run as plain Python without it
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+MASK64 = (1 << 64) - 1
+# A graph with more than n^2 / DENSE_THRESHOLD edges is implied with bit rows
+DENSE_THRESHOLD = 64
+
+
+def splitmix64(x: int) -> int:
+    """SplitMix64 finalizer: mix an integer into a well-distributed 64-bit hash."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def build_csr(src: np.ndarray, dst: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Build CSR arrays so that the targets of u are indices[indptr[u]:indptr[u + 1]]."""
+    indptr = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    # A stable sort on the source keeps each node's targets in input order
+    indices = dst[np.argsort(src, kind='stable')].astype(np.int32)
+    return indptr, indices
+
+
+@njit(cache=True, boundscheck=False)
+def _strongly_connected_components(indptr, indices, active):
+    """Label the strongly connected components of the subgraph induced by active.
+
+    Iterative Tarjan: ``call_node``/``call_edge`` hold the DFS path and the next
+    edge to follow from each node on it. Returns ``(scc_id, num_sccs)``, with
+    ``scc_id`` left at -1 for inactive nodes.
+    """
+    n = len(indptr) - 1
+    order = np.full(n, -1, dtype=np.int32)
+    lowlink = np.zeros(n, dtype=np.int32)
+    on_stack = np.zeros(n, dtype=np.bool_)
+    scc_id = np.full(n, -1, dtype=np.int32)
+    stack = np.empty(n, dtype=np.int32)
+    call_node = np.empty(n, dtype=np.int32)
+    call_edge = np.empty(n, dtype=np.int32)
+    stack_top = 0
+    counter = 0
+    num_sccs = 0
+    for root in range(n):
+        if order[root] != -1 or not active[root]:
+            continue
+        order[root] = counter
+        lowlink[root] = counter
+        counter += 1
+        stack[stack_top] = root
+        stack_top += 1
+        on_stack[root] = True
+        call_node[0] = root
+        call_edge[0] = indptr[root]
+        depth = 1
+        while depth > 0:
+            u = call_node[depth - 1]
+            e = call_edge[depth - 1]
+            if e < indptr[u + 1]:
+                # Follow the next edge out of u
+                call_edge[depth - 1] = e + 1
+                v = indices[e]
+                if not active[v]:
+                    continue
+                if order[v] == -1:
+                    order[v] = counter
+                    lowlink[v] = counter
+                    counter += 1
+                    stack[stack_top] = v
+                    stack_top += 1
+                    on_stack[v] = True
+                    call_node[depth] = v
+                    call_edge[depth] = indptr[v]
+                    depth += 1
+                elif on_stack[v]:
+                    lowlink[u] = min(lowlink[u], order[v])
+                continue
+
+            # All edges of u done: return to its parent, emitting u's SCC if u is its root
+            depth -= 1
+            if depth > 0:
+                parent = call_node[depth - 1]
+                lowlink[parent] = min(lowlink[parent], lowlink[u])
+            if lowlink[u] == order[u]:
+                while True:
+                    stack_top -= 1
+                    w = stack[stack_top]
+                    on_stack[w] = False
+                    scc_id[w] = num_sccs
+                    if w == u:
+                        break
+                num_sccs += 1
+    return scc_id, num_sccs
+
+
+@njit(cache=True, boundscheck=False)
+def _residual_core(indptr, indices, pred_indptr, pred_indices, in_degree,
+                   unreached_succ_count, reachable_bits, self_loop, core):
+    """Trim the unreachable subgraph from both ends and count its cyclic SCCs.
+
+    Forward, nodes with no unreachable predecessor are peeled as implication
+    would reach them; backward, nodes with no unreachable successor are peeled
+    since they cannot lie on a cycle. What survives both directions is split
+    into SCCs; ``core`` is set to the nodes of the cyclic ones and their count
+    is returned.
+    """
+    n = len(in_degree)
+    fwd = in_degree.copy()
+    bwd = unreached_succ_count.copy()
+    queue = np.empty(n, dtype=np.int32)
+    head = 0
+    tail = 0
+    for v in range(n):
+        core[v] = (reachable_bits[v >> 6] >> np.uint64(v & 63)) & np.uint64(1) == 0
+        if core[v] and (fwd[v] == 0 or bwd[v] == 0):
+            core[v] = False
+            queue[tail] = v
+            tail += 1
+    while head < tail:
+        u = queue[head]
+        head += 1
+        # u no longer feeds its successors...
+        for j in range(indptr[u], indptr[u + 1]):
+            v = indices[j]
+            if core[v]:
+                fwd[v] -= 1
+                if fwd[v] == 0:
+                    core[v] = False
+                    queue[tail] = v
+                    tail += 1
+        # ...nor drains into its predecessors
+        for j in range(pred_indptr[u], pred_indptr[u + 1]):
+            v = pred_indices[j]
+            if core[v]:
+                bwd[v] -= 1
+                if bwd[v] == 0:
+                    core[v] = False
+                    queue[tail] = v
+                    tail += 1
+
+    # Both fronts have met: only the cycles of the unreachable subgraph remain
+    scc_id, num_sccs = _strongly_connected_components(indptr, indices, core)
+    scc_size = np.zeros(num_sccs, dtype=np.int32)
+    cyclic = np.zeros(num_sccs, dtype=np.bool_)
+    for v in range(n):
+        if core[v]:
+            scc_size[scc_id[v]] += 1
+            # A self-loop is a cycle even in a single-node SCC
+            if self_loop[v] or scc_size[scc_id[v]] > 1:
+                cyclic[scc_id[v]] = True
+    for v in range(n):
+        if core[v] and not cyclic[scc_id[v]]:
+            core[v] = False
+    return np.count_nonzero(cyclic)
+
+
+@njit(cache=True, boundscheck=False)
+def _heap_before(scores, a, b):
+    """Heap order: higher score first, ties broken towards the larger node id."""
+    return scores[a] > scores[b] or (scores[a] == scores[b] and a > b)
+
+
+@njit(cache=True, boundscheck=False)
+def _heap_sift_up(heap, pos, scores, i):
+    node = heap[i]
+    while i > 0:
+        parent = (i - 1) >> 1
+        if not _heap_before(scores, node, heap[parent]):
+            break
+        heap[i] = heap[parent]
+        pos[heap[i]] = i
+        i = parent
+    heap[i] = node
+    pos[node] = i
+
+
+@njit(cache=True, boundscheck=False)
+def _heap_sift_down(heap, pos, scores, size, i):
+    node = heap[i]
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and _heap_before(scores, heap[child + 1], heap[child]):
+            child += 1
+        if not _heap_before(scores, heap[child], node):
+            break
+        heap[i] = heap[child]
+        pos[heap[i]] = i
+        i = child
+    heap[i] = node
+    pos[node] = i
+
+
+@njit(cache=True, boundscheck=False)
+def _heap_remove(heap, pos, scores, size, node):
+    """Remove node from the heap and return the new size."""
+    i = pos[node]
+    pos[node] = -1
+    size -= 1
+    if i < size:
+        # Move the last node into the hole and restore order in either direction
+        moved = heap[size]
+        heap[i] = moved
+        pos[moved] = i
+        _heap_sift_up(heap, pos, scores, i)
+        _heap_sift_down(heap, pos, scores, size, pos[moved])
+    return size
+
+
+@njit(cache=True, boundscheck=False)
+def _heap_update(heap, pos, scores, size, nodes, new_scores, eligible):
+    """Rescore nodes in place, inserting or removing them as eligible says.
+
+    Returns the new heap size.
+    """
+    for k in range(len(nodes)):
+        node = nodes[k]
+        if not eligible[k]:
+            if pos[node] >= 0:
+                size = _heap_remove(heap, pos, scores, size, node)
+            scores[node] = new_scores[k]
+            continue
+        scores[node] = new_scores[k]
+        if pos[node] < 0:
+            heap[size] = node
+            pos[node] = size
+            size += 1
+            _heap_sift_up(heap, pos, scores, size - 1)
+        else:
+            _heap_sift_up(heap, pos, scores, pos[node])
+            _heap_sift_down(heap, pos, scores, size, pos[node])
+    return size
+
+
+@njit(cache=True, boundscheck=False)
+def _heap_top(heap, pos, scores, size, allowed, out):
+    """Fill out with the best allowed nodes in heap order; return how many.
+
+    Nodes are popped until out is full and then pushed back, so the heap is
+    left unchanged apart from its internal layout.
+    """
+    popped = np.empty(size, dtype=heap.dtype)
+    num_popped = 0
+    found = 0
+    while size > 0 and found < len(out):
+        node = heap[0]
+        size = _heap_remove(heap, pos, scores, size, node)
+        popped[num_popped] = node
+        num_popped += 1
+        if allowed[node]:
+            out[found] = node
+            found += 1
+    for k in range(num_popped):
+        node = popped[k]
+        heap[size] = node
+        pos[node] = size
+        size += 1
+        _heap_sift_up(heap, pos, scores, size - 1)
+    return found
+
+
+class SGraph:
+    """Directed graph in CSR form for Kuo's algorithm with efficient backtracking.
+
+    Nodes are identified by integer ids ``0..n-1`` and ``nodes[i]`` holds the
+    original label. Edges are never structurally removed:
+    since removals are always undone in LIFO order, "removing" an edge only
+    decrements the in-degree counter of its target.
+    """
     
-    def __init__(self, iterable=None, **attr):
-        super().__init__(iterable, **attr)
+    def __init__(self, us: np.ndarray, vs: np.ndarray, nodes: List):
+        """Build the graph from parallel arrays of edge endpoint ids and node labels."""
+        self.nodes: List = list(nodes)
+        n = len(self.nodes)
+
+        # Drop duplicate edges
+        keys = np.unique(us.astype(np.int64) * n + vs)
+        us = (keys // n).astype(np.int32)
+        vs = (keys % n).astype(np.int32)
+
+        # CSR adjacency and its transpose for successor/predecessor queries
+        self.indptr, self.indices = build_csr(us, vs, n)
+        self.pred_indptr, self.pred_indices = build_csr(vs, us, n)
+        self.out_degree = np.diff(self.indptr)
+        # Dense graphs also keep their adjacency as rows of bits in both
+        # directions, so implication can work on 64 nodes per word
+        self.succ_bits = self.pred_bits = None
+        if len(vs) * DENSE_THRESHOLD > n * n:
+            num_words = (n + 63) // 64
+            self.succ_bits = np.zeros((n, num_words), dtype=np.uint64)
+            self.pred_bits = np.zeros((n, num_words), dtype=np.uint64)
+            np.bitwise_or.at(self.succ_bits, (us, vs >> 6),
+                             np.uint64(1) << (vs & 63).astype(np.uint64))
+            np.bitwise_or.at(self.pred_bits, (vs, us >> 6),
+                             np.uint64(1) << (us & 63).astype(np.uint64))
+
+        # Live in-degree of every node, decremented as edges are removed
+        self.in_degree = np.bincount(vs, minlength=n).astype(np.int32)
+        # Number of each node's successors that are not reachable yet
+        self.unreached_succ_count = self.out_degree.copy()
         # Sets discovered at each level
-        self.sets: List[Set] = []
-        # All reachable nodes so far
-        self.reachable: Set = set()
-        # Stack for edge restoration during backtracking
-        self._edge_restore_stack: List[Tuple] = []
-        # Cache node degrees for faster access
-        self._in_degree_cache: Dict = {}
-        self._refresh_degree_cache()
-    
-    def _refresh_degree_cache(self):
-        """Update in-degree cache for all nodes."""
-        self._in_degree_cache = dict(self.in_degree())
-    
-    def get_zero_indegree_nodes(self, exclude_reachable=True) -> Set:
+        self.sets: List[Set[int]] = []
+        # All reachable nodes so far as a packed bitset, plus its popcount
+        self.reachable_bits = np.zeros((n + 63) // 64, dtype=np.uint64)
+        self.reachable_count = 0
+        # Strongly connected components. Every cyclic SCC needs at least one S0
+        # node, and a node outside every cycle is never needed in S0 at all.
+        self.scc_id, num_sccs = _strongly_connected_components(
+            self.indptr, self.indices, np.ones(n, dtype=np.bool_))
+        # A single-node SCC is cyclic only through a self-loop
+        self.self_loop = np.zeros(n, dtype=np.bool_)
+        self.self_loop[us[us == vs]] = True
+        cyclic = np.bincount(self.scc_id, minlength=num_sccs) > 1
+        cyclic[self.scc_id[self.self_loop]] = True
+        self.on_cycle = cyclic[self.scc_id]
+        self.num_cyclic_sccs = int(np.count_nonzero(cyclic))
+        # S0 members per SCC, and the count of cyclic SCCs with none
+        self.scc_s0_count = np.zeros(num_sccs, dtype=np.int32)
+        self.uncovered_sccs = self.num_cyclic_sccs
+        # Unreachable nodes still on a cycle, as of the last residual_cyclic_sccs call
+        self.residual_core = self.on_cycle.copy()
+        # Unreachable nodes whose in-degree is 0, kept up to date incrementally
+        self.zero_frontier: Set[int] = set(np.flatnonzero(self.in_degree == 0).tolist())
+        # Hashes of S0 sets known to fail implication, plus (k, hash) keys of
+        # partial S0 sets from which the size-k search came up empty. The hash
+        # of a set is the XOR of its members' node hashes, so it is updated in
+        # O(1) per node.
+        self.failed_s0_cache: Set = set()
+        self.current_s0_hash = 0
+        self._node_hash = [splitmix64(node) for node in range(n)]
+        # Indexed max-heap of candidate nodes: heap[:heap_size] holds exactly the
+        # unreachable cycle nodes and heap_pos[v] is v's slot there (-1 if absent)
+        self._heap = np.empty(n, dtype=np.int32)
+        self._heap_pos = np.full(n, -1, dtype=np.int32)
+        self._heap_size = 0
+        self._scores = np.zeros(n, dtype=np.int64)
+        self._dirty_scores: Set[int] = set()
+        # Stack for edge restoration during backtracking. Every edge is removed
+        # at most once at a time, so |E| entries always suffice.
+        self._restore_u = np.empty(len(self.indices), dtype=np.int32)
+        self._restore_v = np.empty(len(self.indices), dtype=np.int32)
+        self._restore_top = 0
+        # Scratch buffers for the implication kernel
+        self._level_nodes = np.empty(n, dtype=np.int32)
+        self._level_start = np.empty(n + 1, dtype=np.int32)
+        self._mask_buffer = np.empty_like(self.reachable_bits)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices)
+
+    def labels(self, nodes) -> Set:
+        """Translate a collection of node ids back to their original labels."""
+        return {self.nodes[node] for node in nodes}
+
+    def successors(self, u: int) -> np.ndarray:
+        """Return the successor ids of node u as a CSR slice."""
+        return self.indices[self.indptr[u]:self.indptr[u + 1]]
+
+    def predecessors(self, v: int) -> np.ndarray:
+        """Return the predecessor ids of node v as a slice of the transpose CSR."""
+        return self.pred_indices[self.pred_indptr[v]:self.pred_indptr[v + 1]]
+
+    def is_reachable(self, nodes):
+        """Test reachability of a node id or an array of node ids."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        bits = self.reachable_bits[nodes >> 6] >> (nodes & 63).astype(np.uint64)
+        return (bits & np.uint64(1)) != 0
+
+    def _nodes_mask(self, nodes) -> np.ndarray:
+        """Pack a collection of node ids into the preallocated bitset buffer."""
+        nodes = np.fromiter(nodes, dtype=np.int64, count=len(nodes))
+        mask = self._mask_buffer
+        mask[:] = 0
+        np.bitwise_or.at(mask, nodes >> 6, np.uint64(1) << (nodes & 63).astype(np.uint64))
+        return mask
+
+    def add_reachable(self, nodes):
+        """Add a collection of currently unreachable nodes to the reachable set."""
+        self.reachable_bits |= self._nodes_mask(nodes)
+        self.reachable_count += len(nodes)
+        self.zero_frontier.difference_update(nodes)
+        for v in nodes:
+            self.unreached_succ_count[self.predecessors(v)] -= 1
+
+    def remove_reachable(self, nodes):
+        """Undo a matching add_reachable call."""
+        # The bits were all clear before being added, so XOR clears exactly them
+        self.reachable_bits ^= self._nodes_mask(nodes)
+        self.reachable_count -= len(nodes)
+        self.zero_frontier.update(v for v in nodes if self.in_degree[v] == 0)
+        for v in nodes:
+            self.unreached_succ_count[self.predecessors(v)] += 1
+
+    def get_zero_indegree_nodes(self, exclude_reachable=True) -> Set[int]:
         """Get all nodes with in-degree 0, optionally excluding already reachable nodes."""
-        zero_degree_nodes = {node for node, degree in self._in_degree_cache.items() if degree == 0}
         if exclude_reachable:
-            return zero_degree_nodes - self.reachable
-        return zero_degree_nodes
-    
-    def remove_edge(self, u, v):
-        """Remove edge and update degree cache."""
-        removed_edge = super().remove_edge(u, v)
-        self._edge_restore_stack.append((u, v))
-        # Update in-degree for the target node
-        self._in_degree_cache[v] -= 1
-        return removed_edge
+            return set(self.zero_frontier)
+        return set(np.flatnonzero(self.in_degree == 0).tolist())
     
-    def restore_edge(self):
-        """Restore edge from stack and update degree cache."""
-        if not self._edge_restore_stack:
-            return None
-        u, v = self._edge_restore_stack.pop()
-        self.add_edge(u, v)
-        # Update in-degree for the target node
-        self._in_degree_cache[v] += 1
-        return (u, v)
+    def restore_edges_to(self, top: int):
+        """Restore every edge removed since the restore stack was at top."""
+        restored = self._restore_v[top:self._restore_top]
+        np.add.at(self.in_degree, restored, 1)
+        self._restore_top = top
+        # Every restored target now has an incoming edge again
+        self.zero_frontier.difference_update(restored.tolist())
     
-    def remove_node_successors(self, nodes: Set) -> int:
+    def init_candidate_queue(self):
+        """Score every node once and heapify the unreachable cycle nodes."""
+        nodes = np.arange(len(self.nodes), dtype=np.int32)
+        self._heap_pos.fill(-1)
+        self._heap_size = 0
+        self._dirty_scores.clear()
+        self._update_heap(nodes)
+
+    def update_candidate_scores(self, node: int):
+        """Mark the nodes affected by node entering or leaving the reachable set.
+
+        Only node itself, its successors (in-degree changed) and its predecessors
+        (count of unreachable successors changed) can have a new score. They are
+        rescored lazily on the next top_candidates call.
+        """
+        self._dirty_scores.add(node)
+        self._dirty_scores.update(self.successors(node).tolist())
+        self._dirty_scores.update(self.predecessors(node).tolist())
+
+    def _update_heap(self, nodes: np.ndarray):
+        """Rescore nodes and move, insert or drop them in the heap accordingly."""
+        eligible = self.on_cycle[nodes] & ~self.is_reachable(nodes)
+        self._heap_size = int(_heap_update(
+            self._heap, self._heap_pos, self._scores, self._heap_size,
+            nodes, score_node(self, nodes), eligible))
+
+    def _flush_candidate_scores(self):
+        """Rescore the dirty nodes in one batch."""
+        if self._dirty_scores:
+            dirty = self._dirty_scores
+            self._update_heap(np.fromiter(dirty, dtype=np.int32, count=len(dirty)))
+            dirty.clear()
+
+    def top_candidates(self, count: int, allowed=None) -> List[int]:
+        """Return up to count unreachable cycle nodes with the highest scores.
+
+        If given, the boolean array ``allowed`` further restricts the nodes.
+        """
+        self._flush_candidate_scores()
+        if allowed is None:
+            allowed = self.on_cycle
+        out = np.empty(min(count, self._heap_size), dtype=np.int32)
+        found = _heap_top(self._heap, self._heap_pos, self._scores,
+                          self._heap_size, allowed, out)
+        return out[:found].tolist()
+
+    def residual_cyclic_sccs(self) -> int:
+        """Count the cyclic SCCs among unreachable nodes, a lower bound on the
+        S0 nodes still needed. Also refreshes ``residual_core``.
+        """
+        return int(_residual_core(
+            self.indptr, self.indices, self.pred_indptr, self.pred_indices,
+            self.in_degree, self.unreached_succ_count, self.reachable_bits,
+            self.self_loop, self.residual_core))
+
+    def remove_node_successors(self, nodes: Set[int]) -> int:
         """Remove all outgoing edges from a set of nodes. Returns count of removed edges."""
-        successor_list = []
-        for u in nodes:
-            for v in self.successors(u):
-                successor_list.append((u, v))
-        
-        for (u, v) in successor_list:
-            self.remove_edge(u, v)
-        
-        return len(successor_list)
+        sources = np.fromiter(nodes, dtype=np.int32, count=len(nodes))
+        starts = self.indptr[sources]
+        counts = self.indptr[sources + 1] - starts
+        edge_count = int(counts.sum())
+
+        # Gather every outgoing edge in one pass: the CSR positions of source i
+        # run from starts[i] for counts[i] entries
+        positions = np.arange(edge_count) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        targets = self.indices[positions]
+
+        # Push them onto the restore stack as one slice and update in-degrees
+        top = self._restore_top
+        self._restore_u[top:top + edge_count] = np.repeat(sources, counts)
+        self._restore_v[top:top + edge_count] = targets
+        self._restore_top = top + edge_count
+        np.subtract.at(self.in_degree, targets, 1)
+
+        zeroed = targets[self.in_degree[targets] == 0]
+        self.zero_frontier.update(zeroed[~self.is_reachable(zeroed)].tolist())
+        return edge_count
+
+    def covers_new_scc(self, node: int) -> bool:
+        """Whether node lies in a cyclic SCC that has no S0 member yet."""
+        return bool(self.on_cycle[node]) and self.scc_s0_count[self.scc_id[node]] == 0
+
+    def extend_s0(self, node: int) -> int:
+        """Add an unreachable node to S0 and remove its outgoing edges.
+
+        Returns the restore stack checkpoint for the matching retract_s0 call.
+        """
+        checkpoint = self._restore_top
+        self.sets[0].add(node)
+        self.current_s0_hash ^= self._node_hash[node]
+        if self.covers_new_scc(node):
+            self.uncovered_sccs -= 1
+        self.scc_s0_count[self.scc_id[node]] += 1
+        self.add_reachable((node,))
+        self.remove_node_successors({node})
+        self.update_candidate_scores(node)
+        return checkpoint
+
+    def retract_s0(self, node: int, checkpoint: int):
+        """Undo the extend_s0 call that added node to S0."""
+        self.sets[0].remove(node)
+        self.current_s0_hash ^= self._node_hash[node]
+        self.scc_s0_count[self.scc_id[node]] -= 1
+        if self.covers_new_scc(node):
+            self.uncovered_sccs += 1
+        self.remove_reachable((node,))
+        self.restore_edges_to(checkpoint)
+        self.update_candidate_scores(node)
+
 
+def get_graph_from_file(filename, use_cache=True) -> SGraph:
+    """Create graph from file, interning node labels to integer ids while streaming.
 
-def get_graph_from_file(filename) -> SGraph:
-    """Create graph from file with more efficient parsing."""
+    The CSR arrays are saved next to the file as ``<filename>.csr.npz`` and
+    reused on later runs for as long as the cache is newer than the file. A
+    damaged cache is ignored and rewritten.
+    """
+    cache_file = os.fspath(filename) + ".csr.npz"
+    if use_cache and os.path.exists(cache_file) \
+            and os.path.getmtime(cache_file) >= os.path.getmtime(filename):
+        try:
+            with np.load(cache_file) as cache:
+                indptr, indices, nodes = cache["indptr"], cache["indices"], cache["nodes"]
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            pass  # Fall through to re-parse the file and overwrite the cache
+        else:
+            us = np.repeat(np.arange(len(nodes), dtype=np.int32), np.diff(indptr))
+            return SGraph(us, indices, nodes.tolist())
+
+    node2id: Dict[str, int] = {}
+    us, vs = [], []
     with open(filename, "r") as file:
-        input_edges = []
         for line in file:
-            edges = line.strip().split()
-            if len(edges) >= 2 and edges[0] != edges[1]:  # Exclude self-edges
-                input_edges.append((edges[0], edges[1]))
+            edge = line.split(None, 2)
+            if len(edge) < 2 or edge[0] == edge[1]:  # Exclude self-edges
+                continue
+            us.append(node2id.setdefault(edge[0], len(node2id)))
+            vs.append(node2id.setdefault(edge[1], len(node2id)))
 
-    return SGraph(input_edges)
+    graph = SGraph(np.asarray(us, dtype=np.int32), np.asarray(vs, dtype=np.int32), list(node2id))
+    if use_cache:
+        try:
+            # Write to a temporary file and move it into place, so an interrupted
+            # or concurrent run never leaves a partial cache behind
+            fd, tmp_file = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(cache_file) or ".")
+            try:
+                with os.fdopen(fd, "wb") as file:
+                    np.savez(file, indptr=graph.indptr, indices=graph.indices,
+                             nodes=np.array(graph.nodes, dtype=str))
+                os.replace(tmp_file, cache_file)
+            except BaseException:
+                os.remove(tmp_file)
+                raise
+        except OSError:
+            pass  # Caching is best effort, e.g. for read-only data directories
+    return graph
 
 
-def score_node(graph: SGraph, node) -> float:
+def score_node(graph: SGraph, node):
     """Score a node based on its connectivity properties for heuristic selection.
-    Higher scores indicate better candidates for inclusion in S0.
+    Higher scores indicate better candidates for inclusion in S0. ``node`` may
+    also be an array of node ids, which are then scored together.
     """
     # Prioritize nodes with many outgoing edges
-    out_degree = graph.out_degree(node)
+    out_degree = graph.out_degree[node].astype(np.int64)
     
     # But penalize nodes with many incoming edges (those might be reached via implication)
-    in_degree = graph.in_degree(node)
+    in_degree = graph.in_degree[node].astype(np.int64)
     
-    # Calculate how many new nodes this would reach directly
-    new_successors = set(graph.successors(node)) - graph.reachable
+    # How many new nodes this would reach directly, maintained incrementally
+    new_successors = graph.unreached_succ_count[node].astype(np.int64)
     
     # Base score is out_degree - in_degree to prefer "source-like" nodes
     base_score = out_degree - in_degree
     
     # Boost score based on how many new nodes this would reach
-    reach_score = len(new_successors) * 2
+    reach_score = new_successors * 2
     
     return base_score + reach_score
 
 
+@njit(cache=True, boundscheck=False)
+def _implication(indptr, indices, in_degree, reachable_bits, reached,
+                 restore_u, restore_v, restore_top, level_nodes, level_start,
+                 num_frontier):
+    """Iterative implication kernel over the CSR arrays.
+
+    The first ``num_frontier`` entries of ``level_nodes`` must hold the current
+    zero in-degree frontier. Each later level is exactly the set of nodes whose
+    in-degree dropped to 0 while removing the previous level's edges, so no level
+    ever rescans the whole graph. Level ``i`` spans
+    ``level_start[i]:level_start[i + 1]``. Removed edges are pushed onto the
+    graph's restore stack above ``restore_top``. Returns
+    ``(success, num_levels, restore_top)``; on failure every level is rolled back
+    before returning. ``reached`` is the number of bits currently set in
+    ``reachable_bits``.
+    """
+    n = len(in_degree)
+    num_levels = 0
+    node_top = num_frontier
+    top = restore_top
+    level_start[0] = 0
+    while reached < n and node_top > level_start[num_levels]:
+        # Mark the level reachable and remove its outgoing edges
+        level_end = node_top
+        for i in range(level_start[num_levels], level_end):
+            u = level_nodes[i]
+            reachable_bits[u >> 6] |= np.uint64(1) << np.uint64(u & 63)
+            for j in range(indptr[u], indptr[u + 1]):
+                v = indices[j]
+                in_degree[v] -= 1
+                restore_u[top] = u
+                restore_v[top] = v
+                top += 1
+                # Nodes hitting in-degree 0 form the next level
+                if in_degree[v] == 0 and (reachable_bits[v >> 6] >> np.uint64(v & 63)) & np.uint64(1) == 0:
+                    level_nodes[node_top] = v
+                    node_top += 1
+        reached += level_end - level_start[num_levels]
+        num_levels += 1
+        level_start[num_levels] = level_end
+    if reached == n:
+        return True, num_levels, top
+
+    # Backtrack: restore edges and unmark every level
+    for i in range(restore_top, top):
+        in_degree[restore_v[i]] += 1
+    for i in range(node_top):
+        u = level_nodes[i]
+        reachable_bits[u >> 6] ^= np.uint64(1) << np.uint64(u & 63)
+    return False, num_levels, restore_top
+
+
+@njit(cache=True, boundscheck=False)
+def _implication_dense(indptr, indices, succ_bits, pred_bits, in_degree, reachable_bits,
+                       reached, restore_u, restore_v, restore_top, level_nodes,
+                       level_start, num_frontier):
+    """Implication kernel for dense graphs, over successor and predecessor bit rows.
+
+    Same arguments and result as ``_implication``, plus the bit rows. The
+    successor rows of a level are OR-ed into a word-wide candidate mask, and a
+    candidate joins the next level once its predecessor row has no bit outside
+    ``reachable_bits``. in_degree is left alone until implication succeeds,
+    when the reached levels' edges are removed and pushed onto the restore stack.
+    """
+    n = len(in_degree)
+    num_words = succ_bits.shape[1]
+    candidates = np.empty(num_words, dtype=np.uint64)
+    # First word of each predecessor row that may still hold an unreachable
+    # node; the reachable set only grows here, so earlier words need no recheck
+    watch = np.zeros(n, dtype=np.int32)
+    num_levels = 0
+    node_top = num_frontier
+    level_start[0] = 0
+    while reached < n and node_top > level_start[num_levels]:
+        # Mark the level reachable and gather its successors
+        level_end = node_top
+        candidates[:] = 0
+        for i in range(level_start[num_levels], level_end):
+            u = level_nodes[i]
+            reachable_bits[u >> 6] |= np.uint64(1) << np.uint64(u & 63)
+            for w in range(num_words):
+                candidates[w] |= succ_bits[u, w]
+        reached += level_end - level_start[num_levels]
+        num_levels += 1
+        level_start[num_levels] = level_end
+        # Unreachable successors with no unreachable predecessor left form the next level
+        for w in range(num_words):
+            word = candidates[w] & ~reachable_bits[w]
+            while word != 0:
+                # Peel off the lowest set bit; log2 of a power of two is exact
+                low = word & (~word + np.uint64(1))
+                word ^= low
+                v = (w << 6) + int(np.log2(np.float64(low)))
+                # Words before watch[v] were found fully reachable earlier on
+                x = watch[v]
+                while x < num_words and pred_bits[v, x] & ~reachable_bits[x] == 0:
+                    x += 1
+                watch[v] = x
+                if x == num_words:
+                    level_nodes[node_top] = v
+                    node_top += 1
+    if reached == n:
+        top = restore_top
+        for i in range(node_top):
+            u = level_nodes[i]
+            for j in range(indptr[u], indptr[u + 1]):
+                v = indices[j]
+                in_degree[v] -= 1
+                restore_u[top] = u
+                restore_v[top] = v
+                top += 1
+        return True, num_levels, top
+
+    # Backtrack: only the reachable bits were touched
+    for i in range(node_top):
+        u = level_nodes[i]
+        reachable_bits[u >> 6] ^= np.uint64(1) << np.uint64(u & 63)
+    return False, num_levels, restore_top
+
+
 def implication(graph: SGraph, debug_mode=False, level=1) -> bool:
     """Run the implication process to find reachable nodes."""
-    # If all nodes are reachable, we're done
-    if len(graph.reachable) == len(graph.nodes):
-        if debug_mode:
-            print(f"Implication successful at level {level}")
-        return True
-    
-    # Find all nodes with in-degree 0 (not already reached)
-    s_i = graph.get_zero_indegree_nodes()
-    
-    if s_i:
-        # Update reachable set with newly discovered nodes
-        graph.sets.append(s_i)
-        graph.reachable.update(s_i)
-        
-        if debug_mode:
-            print(f"Implication level {level}: {s_i}")
-        
-        # Remove outgoing edges from these nodes
-        edge_count = graph.remove_node_successors(s_i)
-        
-        # Recursively continue implication
-        success = implication(graph, debug_mode, level + 1)
-        
-        # If successful, we're done
-        if success:
-            return True
-        
-        # Otherwise backtrack: restore edges and update reachable set
-        graph.sets.pop()
-        graph.reachable.difference_update(s_i)
-        for _ in range(edge_count):
-            graph.restore_edge()
-            
-        return False
+    num_frontier = len(graph.zero_frontier)
+    graph._level_nodes[:num_frontier] = list(graph.zero_frontier)
+    # Dense graphs get the bit row kernel, sparse ones the CSR kernel
+    if graph.succ_bits is not None:
+        success, num_levels, graph._restore_top = _implication_dense(
+            graph.indptr, graph.indices, graph.succ_bits, graph.pred_bits,
+            graph.in_degree, graph.reachable_bits, graph.reachable_count,
+            graph._restore_u, graph._restore_v, graph._restore_top,
+            graph._level_nodes, graph._level_start, num_frontier)
     else:
-        if debug_mode:
-            print(f"No further implications found at level {level}")
+        success, num_levels, graph._restore_top = _implication(
+            graph.indptr, graph.indices, graph.in_degree, graph.reachable_bits,
+            graph.reachable_count, graph._restore_u, graph._restore_v, graph._restore_top,
+            graph._level_nodes, graph._level_start, num_frontier)
+
+    if not success and not debug_mode:
         return False
 
+    # Tracing and bookkeeping run only once, after the kernel has finished
+    levels = [set(graph._level_nodes[graph._level_start[i]:graph._level_start[i + 1]].tolist())
+              for i in range(num_levels)]
+    if debug_mode:
+        for i, s_i in enumerate(levels):
+            print(f"Implication level {level + i}: {graph.labels(s_i)}")
+        if success:
+            print(f"Implication successful at level {level + num_levels}")
+        else:
+            print(f"No further implications found at level {level + num_levels}")
+
+    if success:
+        # Keep the reached levels on the graph; their edges stay on the restore stack
+        graph.zero_frontier.clear()
+        graph.unreached_succ_count[:] = 0
+        for s_i in levels:
+            graph.sets.append(s_i)
+            graph.reachable_count += len(s_i)
+    return success
+
 
 def find_candidates(graph: SGraph, k_remaining: int) -> List:
     """Find the best candidate nodes to include in S0 based on heuristic scoring."""
     # Candidates are nodes not yet in S0 or reachable
-    candidates = set(graph.nodes) - graph.reachable
+    num_candidates = len(graph.nodes) - graph.reachable_count
     
-    # Score and rank candidates
-    scored_candidates = [(score_node(graph, node), node) for node in candidates]
-    
-    # Return top k_remaining + buffer candidates
-    buffer = min(10, len(scored_candidates))  # Include some extra candidates
-    return [node for _, node in heapq.nlargest(k_remaining + buffer, scored_candidates)]
+    # Return top k_remaining + buffer candidates from the incremental queue,
+    # skipping nodes no longer on any cycle among the unreachable nodes
+    buffer = min(10, num_candidates)  # Include some extra candidates
+    return graph.top_candidates(k_remaining + buffer, graph.residual_core)
 
 
-def run_combination(graph: SGraph, k: int, debug_mode=False) -> bool:
-    """Try to find a valid S0 of size k using backtracking with heuristics."""
-    s_0 = graph.sets[0]
-    k0 = len(s_0)
-    
+def _test_s0(graph: SGraph, debug_mode=False) -> bool:
+    """Run implication on the current S0, caching it if it fails."""
+    if debug_mode:
+        print(f"Testing implication with S0: {graph.labels(graph.sets[0])}")
+    success = implication(graph, debug_mode)
+    if not success:
+        graph.failed_s0_cache.add(graph.current_s0_hash)
+    return success
+
+
+def run_combination(graph: SGraph, k: int, debug_mode=False, should_stop=None) -> bool:
+    """Try to find a valid S0 of size k using backtracking with heuristics.
+
+    The search walks an explicit stack instead of recursing: each frame is the
+    candidate list for one S0 extension level plus the index of the next
+    candidate to try, and ``path`` holds the (node, checkpoint) extension that
+    led to each frame so it can be undone when the frame is exhausted.
+
+    ``should_stop`` is polled whenever a level is exhausted; once it returns
+    True the search gives up, leaving the graph mid-search.
+    """
+    # Each uncovered cyclic SCC needs its own node among the remaining picks
+    if graph.uncovered_sccs > k - len(graph.sets[0]):
+        return False
+
     # If we already have enough nodes in S0, try implication
-    if k0 >= k:
-        if debug_mode:
-            print(f"Testing implication with S0: {s_0}")
-        return implication(graph, debug_mode)
+    if len(graph.sets[0]) >= k:
+        return _test_s0(graph, debug_mode)
+
+    # Each cycle left among unreachable nodes needs a node of its own too
+    if graph.residual_cyclic_sccs() > k - len(graph.sets[0]):
+        return False
     
     # Find the best candidates to try
-    candidates = find_candidates(graph, k - k0)
+    stack = [[find_candidates(graph, k - len(graph.sets[0])), 0]]
+    path: List[Tuple[int, int]] = []
     
-    for node in candidates:
+    while stack:
+        frame = stack[-1]
+        candidates, index = frame
+        
+        # Level exhausted: backtrack the extension that led to it
+        if index == len(candidates):
+            if should_stop is not None and should_stop():
+                return False
+            stack.pop()
+            if path:
+                # No completion of this partial S0 works; remember it for other orderings
+                graph.failed_s0_cache.add((k, graph.current_s0_hash))
+                graph.retract_s0(*path.pop())
+            continue
+        node = candidates[index]
+        frame[1] = index + 1
+        
         # Skip if node is already reachable
-        if node in graph.reachable:
+        if graph.is_reachable(node):
+            continue
+
+        # Skip nodes that would leave more uncovered cyclic SCCs than picks left
+        k0 = len(graph.sets[0])
+        if graph.uncovered_sccs - graph.covers_new_scc(node) > k - k0 - 1:
+            continue
+
+        # Skip S0 sets already known to fail, e.g. reached in another order
+        s0_hash = graph.current_s0_hash ^ graph._node_hash[node]
+        if (s0_hash if k0 + 1 >= k else (k, s0_hash)) in graph.failed_s0_cache:
             continue
             
-        # Add node to S0 and reachable set
-        graph.sets[0].add(node)
-        graph.reachable.add(node)
-        
-        # Remove outgoing edges
-        edge_count = graph.remove_node_successors({node})
+        # Add node to S0 and remove its outgoing edges
+        checkpoint = graph.extend_s0(node)
         
-        # Recurse
-        success = run_combination(graph, k, debug_mode)
-        
-        # If successful, we're done
-        if success:
-            return True
-            
-        # Otherwise backtrack
-        graph.sets[0].remove(node)
-        graph.reachable.remove(node)
-        for _ in range(edge_count):
-            graph.restore_edge()
+        if k0 + 1 >= k:
+            # S0 is complete: test it, backtracking right away on failure
+            if _test_s0(graph, debug_mode):
+                return True
+            graph.retract_s0(node, checkpoint)
+        elif graph.residual_cyclic_sccs() > k - k0 - 1:
+            # Too many cycles left among unreachable nodes for the picks left
+            graph.retract_s0(node, checkpoint)
+        else:
+            # Descend into the next extension level
+            path.append((node, checkpoint))
+            stack.append([find_candidates(graph, k - k0 - 1), 0])
             
     return False
 
 
-def kuos_algorithm(graph: SGraph, debug_mode=False, timeout_seconds=300):
-    """Run Kuo's algorithm with timeout and performance enhancements."""
+# Set in worker processes so a finished search can cancel the others
+_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _run_k(graph: SGraph, k: int, debug_mode=False):
+    """Worker entry point: search for an S0 of size k on a private graph copy."""
+    success = run_combination(graph, k, debug_mode, _stop_event.is_set)
+    return success, graph.labels(graph.sets[0]) if success else set()
+
+
+def _parallel_search(graph: SGraph, k_values: range, jobs: int, deadline: float,
+                     debug_mode=False):
+    """Search several k values at once in worker processes.
+
+    The answer is the smallest k that succeeds once every smaller k has failed;
+    at that point (or at the deadline) the remaining workers are told to stop.
+    """
+    stop_event = multiprocessing.Event()
+    results: Dict[int, Tuple[bool, Set]] = {}
+    next_k = k_values.start
+    k_iter = iter(k_values)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(stop_event,)) as executor:
+        # Stop the workers on every way out, including a worker error, so the
+        # executor's shutdown never waits for a full k search to finish
+        try:
+            pending = {}
+            while True:
+                # Keep every worker busy with the next untried k
+                while len(pending) < jobs:
+                    k = next(k_iter, None)
+                    if k is None:
+                        break
+                    if debug_mode:
+                        print(f"Trying to find solution with k={k}")
+                    pending[executor.submit(_run_k, graph, k, debug_mode)] = k
+                if not pending:
+                    return set(), False
+
+                done, _ = wait(pending, timeout=max(deadline - time.time(), 0),
+                               return_when=FIRST_COMPLETED)
+                if not done:
+                    if debug_mode:
+                        print("Timeout while waiting for workers")
+                    return graph.labels(graph.sets[0]), False
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+
+                # Resolve k values in order; a success only counts once all smaller k failed
+                while next_k in results:
+                    success, s_0 = results.pop(next_k)
+                    if success:
+                        if debug_mode:
+                            print(f"Found solution with {next_k} nodes: {s_0}")
+                        return s_0, True
+                    next_k += 1
+        finally:
+            stop_event.set()
+
+
+def kuos_algorithm(graph: SGraph, debug_mode=False, timeout_seconds=300, jobs=1):
+    """Run Kuo's algorithm with timeout and performance enhancements.
+
+    With ``jobs > 1`` the sizes of S0 are tried concurrently in that many
+    worker processes.
+    """
     start_time = time.time()
     
     # Initialize with nodes having zero in-degree
@@ -200,32 +943,45 @@ def kuos_algorithm(graph: SGraph, debug_mode=False, timeout_seconds=300):
     k0 = len(s_0)
     
     graph.sets = [s_0]
-    graph.reachable = s_0.copy()
+    graph.add_reachable(s_0)
+    for node in s_0:
+        graph.current_s0_hash ^= graph._node_hash[node]
     
     # Remove outgoing edges from initial set
     graph.remove_node_successors(s_0)
+    graph.init_candidate_queue()
     
     if debug_mode:
-        print(f"Starting with initial set S0: {s_0} (size {k0})")
+        print(f"Starting with initial set S0: {graph.labels(s_0)} (size {k0})")
     
-    # Try increasing sizes of S0
-    for k in range(k0, len(graph.nodes) + 1):
+    # Try increasing sizes of S0, starting from one extra node per cyclic SCC
+    k_values = range(k0 + graph.num_cyclic_sccs, len(graph.nodes) + 1)
+    if jobs > 1:
+        return _parallel_search(graph, k_values, jobs, start_time + timeout_seconds, debug_mode)
+
+    # A timed-out search leaves the graph mid-search, so report the initial S0
+    initial_s0 = graph.labels(s_0)
+
+    def timed_out():
+        return time.time() - start_time > timeout_seconds
+
+    for k in k_values:
         # Check for timeout
-        if time.time() - start_time > timeout_seconds:
+        if timed_out():
             if debug_mode:
                 print(f"Timeout after {timeout_seconds} seconds")
-            return graph.sets[0], False
+            return initial_s0, False
             
         if debug_mode:
             print(f"Trying to find solution with k={k}")
             
         # Try to find a solution with k nodes
-        success = run_combination(graph, k, debug_mode)
+        success = run_combination(graph, k, debug_mode, timed_out)
         
         if success:
             if debug_mode:
-                print(f"Found solution with {k} nodes: {graph.sets[0]}")
-            return graph.sets[0], True
+                print(f"Found solution with {k} nodes: {graph.labels(graph.sets[0])}")
+            return graph.labels(graph.sets[0]), True
     
     # Should never reach here unless graph is empty
     return set(), False
@@ -240,15 +996,19 @@ if __name__ == "__main__":
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
     parser.add_argument('--timeout', type=int, default=300, 
                         help='Timeout in seconds (default: 300)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always re-parse the input instead of using its .csr.npz cache')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Worker processes trying different S0 sizes (default: 1)')
     args = parser.parse_args()
     
     # Run the algorithm
     print(f"Loading graph from {args.file}")
-    G = get_graph_from_file(args.file)
-    print(f"Graph loaded with {len(G.nodes)} nodes and {len(G.edges)} edges")
+    G = get_graph_from_file(args.file, use_cache=not args.no_cache)
+    print(f"Graph loaded with {len(G.nodes)} nodes and {G.num_edges} edges")
     
     start_time = time.time()
-    smallest_set, completed = kuos_algorithm(G, args.debug, args.timeout)
+    smallest_set, completed = kuos_algorithm(G, args.debug, args.timeout, args.jobs)
     end_time = time.time()
     
     print(f"Algorithm {'completed' if completed else 'timed out'} in {end_time - start_time:.2f} seconds")
@@ -0,0 +1,214 @@
+"""Tests for new_kuo.py: kernel cross-checks and a brute-force oracle.
+
+Run from this directory with ``python -m unittest test_new_kuo`` or pytest.
+"""
+import itertools
+import unittest
+
+import numpy as np
+
+import new_kuo
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def random_edges(rng, n, m):
+    """Random edge arrays over n nodes; duplicates and self-loops included."""
+    us = rng.integers(0, n, m).astype(np.int32)
+    vs = rng.integers(0, n, m).astype(np.int32)
+    return us, vs
+
+
+def build_graph(us, vs, n, dense):
+    """Build an SGraph that is forced onto the dense or the CSR kernel."""
+    saved = new_kuo.DENSE_THRESHOLD
+    new_kuo.DENSE_THRESHOLD = n * n + 1 if dense else 0
+    try:
+        graph = new_kuo.SGraph(us, vs, [str(node) for node in range(n)])
+    finally:
+        new_kuo.DENSE_THRESHOLD = saved
+    assert (graph.succ_bits is not None) == (dense and len(us) > 0)
+    return graph
+
+
+def start_search(graph):
+    """Seed S0 with the zero in-degree nodes, as kuos_algorithm does."""
+    s_0 = graph.get_zero_indegree_nodes()
+    graph.sets = [s_0]
+    graph.add_reachable(s_0)
+    graph.remove_node_successors(s_0)
+    graph.init_candidate_queue()
+
+
+def is_acyclic(n, us, vs, removed):
+    """Whether the graph is acyclic once the removed nodes are dropped."""
+    keep = [u not in removed and v not in removed for u, v in zip(us, vs)]
+    edges = set(zip(us[keep].tolist(), vs[keep].tolist()))
+    in_degree = [0] * n
+    for _, v in edges:
+        in_degree[v] += 1
+    queue = [v for v in range(n) if v not in removed and in_degree[v] == 0]
+    seen = len(queue)
+    while queue:
+        u = queue.pop()
+        for _, v in [edge for edge in edges if edge[0] == u]:
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                queue.append(v)
+                seen += 1
+    return seen == n - len(removed)
+
+
+def brute_force_min_s0(n, us, vs):
+    """Size of the smallest S0 for which implication reaches every node.
+
+    That is the zero in-degree nodes plus a minimum feedback vertex set.
+    """
+    sources = set(range(n)) - set(vs.tolist())
+    others = sorted(set(range(n)) - sources)
+    for size in range(len(others) + 1):
+        for extra in itertools.combinations(others, size):
+            if is_acyclic(n, us, vs, sources | set(extra)):
+                return len(sources) + size
+
+
+def assert_same(test, a, b):
+    """Compare kernel results, which are scalars, arrays or tuples of them."""
+    if isinstance(a, tuple):
+        test.assertEqual(len(a), len(b))
+        for x, y in zip(a, b):
+            assert_same(test, x, y)
+    else:
+        np.testing.assert_array_equal(a, b)
+
+
+class DenseKernelTest(unittest.TestCase):
+    """The dense bit-row kernel must leave the graph exactly as the CSR one."""
+
+    def test_matches_csr_kernel(self):
+        rng = np.random.default_rng(0)
+        outcomes = set()
+        for _ in range(60):
+            n = int(rng.integers(2, 150))
+            us, vs = random_edges(rng, n, int(rng.integers(n, 4 * n)))
+            dense = build_graph(us, vs, n, dense=True)
+            sparse = build_graph(us, vs, n, dense=False)
+            start_search(dense)
+            start_search(sparse)
+            for node in rng.permutation(n)[:int(rng.integers(1, n + 1))].tolist():
+                if not sparse.is_reachable(node):
+                    dense.extend_s0(node)
+                    sparse.extend_s0(node)
+            success = new_kuo.implication(sparse)
+            self.assertEqual(new_kuo.implication(dense), success)
+            self.assertEqual(dense.sets, sparse.sets)
+            np.testing.assert_array_equal(dense.in_degree, sparse.in_degree)
+            np.testing.assert_array_equal(dense.reachable_bits, sparse.reachable_bits)
+            # Levels may list their nodes in another order, and so their edges
+            self.assertEqual(dense._restore_top, sparse._restore_top)
+            top = sparse._restore_top
+            self.assertEqual(
+                sorted(zip(dense._restore_u[:top].tolist(), dense._restore_v[:top].tolist())),
+                sorted(zip(sparse._restore_u[:top].tolist(), sparse._restore_v[:top].tolist())))
+            outcomes.add(success)
+        # Both the commit and the rollback paths were exercised
+        self.assertEqual(outcomes, {True, False})
+
+
+@unittest.skipIf(numba is None, "numba is not installed")
+class PythonFallbackTest(unittest.TestCase):
+    """The compiled kernels must agree with their plain Python versions."""
+
+    def run_both(self, kernel, *args):
+        """Run kernel compiled and as Python on copies of args; compare everything."""
+        copies = [[arg.copy() if isinstance(arg, np.ndarray) else arg for arg in args]
+                  for _ in range(2)]
+        assert_same(self, kernel(*copies[0]), kernel.py_func(*copies[1]))
+        for a, b in zip(*copies):
+            np.testing.assert_array_equal(a, b)
+
+    def search_states(self, dense):
+        rng = np.random.default_rng(1)
+        for _ in range(30):
+            n = int(rng.integers(2, 100))
+            us, vs = random_edges(rng, n, int(rng.integers(n, 4 * n)))
+            graph = build_graph(us, vs, n, dense)
+            start_search(graph)
+            for node in rng.permutation(n)[:int(rng.integers(0, n + 1))].tolist():
+                if not graph.is_reachable(node):
+                    graph.extend_s0(node)
+            yield graph
+
+    def implication_args(self, graph):
+        num_frontier = len(graph.zero_frontier)
+        level_nodes = graph._level_nodes.copy()
+        level_nodes[:num_frontier] = sorted(graph.zero_frontier)
+        return (graph.in_degree, graph.reachable_bits, graph.reachable_count,
+                graph._restore_u, graph._restore_v, graph._restore_top,
+                level_nodes, graph._level_start, num_frontier)
+
+    def test_implication(self):
+        for graph in self.search_states(dense=False):
+            self.run_both(new_kuo._implication, graph.indptr, graph.indices,
+                          *self.implication_args(graph))
+
+    def test_implication_dense(self):
+        for graph in self.search_states(dense=True):
+            self.run_both(new_kuo._implication_dense, graph.indptr, graph.indices,
+                          graph.succ_bits, graph.pred_bits, *self.implication_args(graph))
+
+    def test_scc_and_residual_core(self):
+        for graph in self.search_states(dense=False):
+            self.run_both(new_kuo._strongly_connected_components, graph.indptr,
+                          graph.indices, ~graph.is_reachable(np.arange(len(graph.nodes))))
+            self.run_both(new_kuo._residual_core, graph.indptr, graph.indices,
+                          graph.pred_indptr, graph.pred_indices, graph.in_degree,
+                          graph.unreached_succ_count, graph.reachable_bits,
+                          graph.self_loop, graph.residual_core)
+
+    def test_heap(self):
+        rng = np.random.default_rng(2)
+        n = 200
+        heap = np.empty(n, dtype=np.int32)
+        pos = np.full(n, -1, dtype=np.int32)
+        scores = np.zeros(n, dtype=np.int64)
+        size = 0
+        for _ in range(200):
+            nodes = rng.permutation(n)[:int(rng.integers(1, 30))].astype(np.int32)
+            new_scores = rng.integers(-5, 5, len(nodes)).astype(np.int64)
+            eligible = rng.random(len(nodes)) < 0.7
+            self.run_both(new_kuo._heap_update, heap, pos, scores, size,
+                          nodes, new_scores, eligible)
+            size = new_kuo._heap_update(heap, pos, scores, size, nodes, new_scores, eligible)
+            self.run_both(new_kuo._heap_top, heap, pos, scores, size,
+                          rng.random(n) < 0.5, np.empty(min(15, size), dtype=np.int32))
+
+
+class BruteForceTest(unittest.TestCase):
+    """kuos_algorithm must find a minimum S0 on small random graphs."""
+
+    def check_graphs(self, count, seed, jobs=1):
+        rng = np.random.default_rng(seed)
+        for _ in range(count):
+            n = int(rng.integers(1, 9))
+            us, vs = random_edges(rng, n, int(rng.integers(0, 3 * n)))
+            expected = brute_force_min_s0(n, us, vs)
+            for dense in (False, True):
+                graph = build_graph(us, vs, n, dense)
+                s_0, completed = new_kuo.kuos_algorithm(graph, timeout_seconds=60, jobs=jobs)
+                self.assertTrue(completed)
+                self.assertEqual(len(s_0), expected)
+                self.assertTrue(is_acyclic(n, us, vs, {int(label) for label in s_0}))
+
+    def test_serial(self):
+        self.check_graphs(300, seed=3)
+
+    def test_parallel(self):
+        self.check_graphs(5, seed=4, jobs=3)
+
+
+if __name__ == "__main__":
+    unittest.main()